@@ -18,6 +18,13 @@ PINECONE_ENVIRONMENT = os.getenv('PINECONE_ENVIRONMENT', 'gcp-starter')
 RABBITMQ_HOST = os.getenv('RABBITMQ_HOST', 'localhost')
 RABBITMQ_PORT = int(os.getenv('RABBITMQ_PORT', 5672))
 
+# Retry / dead-letter configuration
+WORK_QUEUES = ['recommendation_requests', 'embeddings', 'training_data']
+DEAD_LETTER_EXCHANGE = os.getenv('DEAD_LETTER_EXCHANGE', 'dead_letter')
+MAX_DELIVERY_ATTEMPTS = int(os.getenv('MAX_DELIVERY_ATTEMPTS', 5))
+RETRY_BASE_DELAY_MS = int(os.getenv('RETRY_BASE_DELAY_MS', 1000))
+PREFETCH_COUNT = int(os.getenv('PREFETCH_COUNT', 10))
+
 # Local storage paths
 DATA_DIR = os.path.join(os.path.dirname(__file__), '..', 'movie_data')
 METADATA_FILE = os.path.join(DATA_DIR, 'movie_metadata.json')
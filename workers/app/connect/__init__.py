@@ -1,2 +1,21 @@
-from .redis import RedisConnection
-from .rabbitmq import RabbitMQConnection
\ No newline at end of file
+# Connection classes are resolved on first access so importing one of them
+# doesn't drag in every client library (pika, redis, pinecone) at startup
+_LAZY_ATTRS = {
+    'RedisConnection': '.redis',
+    'RabbitMQConnection': '.rabbitmq',
+    'retry_or_dead_letter': '.rabbitmq',
+    'PineconeConnection': '.pinecone',
+    'is_transient_error': '.pinecone',
+}
+
+__all__ = list(_LAZY_ATTRS)
+
+
+def __getattr__(name):
+    if name not in _LAZY_ATTRS:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    import importlib
+    module = importlib.import_module(_LAZY_ATTRS[name], __name__)
+    value = getattr(module, name)
+    globals()[name] = value
+    return value
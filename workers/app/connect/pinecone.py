@@ -1,4 +1,3 @@
-from pinecone import Pinecone
 import logging
 from app.config import PINECONE_API_KEY, PINECONE_ENVIRONMENT
 
@@ -8,16 +7,24 @@ class PineconeConnection:
     _instance = None
     _user_index = None
     _movie_index = None
+    _pc = None
 
     def __new__(cls):
+        # Creating the singleton is cheap; the client is only built on first use
         if cls._instance is None:
             cls._instance = super(PineconeConnection, cls).__new__(cls)
-            cls._instance._initialize()
         return cls._instance
 
+    @property
+    def pc(self):
+        if self._pc is None:
+            self._initialize()
+        return self._pc
+
     def _initialize(self):
         try:
-            self.pc = Pinecone(api_key=PINECONE_API_KEY)
+            from pinecone import Pinecone
+            self._pc = Pinecone(api_key=PINECONE_API_KEY)
             logger.info("Connected to Pinecone")
         except Exception as e:
             logger.error(f"Failed to connect to Pinecone: {e}")
@@ -35,4 +42,31 @@ class PineconeConnection:
 
     def close(self):
         # Cleanup if needed
-        pass
\ No newline at end of file
+        pass
+
+
+def is_transient_error(e: Exception) -> bool:
+    """True for network/service failures that are worth retrying.
+
+    Timeouts, dropped connections, rate limiting (429) and 5xx responses are
+    transient; everything else (bad input, 4xx, missing vectors) is not.
+    """
+    if isinstance(e, (ConnectionError, TimeoutError)):
+        return True
+    try:
+        from pinecone.exceptions import PineconeApiException, PineconeProtocolError
+        if isinstance(e, PineconeProtocolError):
+            return True
+        if isinstance(e, PineconeApiException):
+            status = e.status or 0
+            return status == 429 or status >= 500
+    except ImportError:
+        pass
+    try:
+        # pinecone's HTTP client surfaces pool/retry exhaustion as urllib3 errors
+        from urllib3.exceptions import HTTPError
+        if isinstance(e, HTTPError):
+            return True
+    except ImportError:
+        pass
+    return False
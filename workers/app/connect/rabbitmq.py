@@ -3,11 +3,68 @@ import os
 import logging
 import time
 from typing import Optional, Tuple
-from ..config import RABBITMQ_HOST, RABBITMQ_PORT
+from ..config import (
+    RABBITMQ_HOST, RABBITMQ_PORT, WORK_QUEUES, DEAD_LETTER_EXCHANGE,
+    MAX_DELIVERY_ATTEMPTS, RETRY_BASE_DELAY_MS, PREFETCH_COUNT
+)
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+ATTEMPTS_HEADER = 'x-attempts'
+
+
+def retry_queue_name(queue: str, attempt: int) -> str:
+    # The delay is part of the name so changing RETRY_BASE_DELAY_MS declares
+    # new queues instead of clashing with the x-message-ttl of existing ones
+    return f"{queue}.retry.{retry_delay_ms(attempt)}ms"
+
+
+def dead_queue_name(queue: str) -> str:
+    return f"{queue}.dead"
+
+
+def retry_delay_ms(attempt: int) -> int:
+    return RETRY_BASE_DELAY_MS * (2 ** (attempt - 1))
+
+
+def retry_or_dead_letter(ch, method, properties, body, queue: str, retryable: bool = True) -> None:
+    """Re-route a failed message and ack the original delivery.
+
+    The message is republished to the retry queue for its attempt number,
+    which holds it for an exponentially growing TTL before dead-lettering it
+    back onto `queue`. Once MAX_DELIVERY_ATTEMPTS is reached it is parked on
+    `<queue>.dead` instead, as is any message with `retryable=False` (e.g.
+    a body that cannot be parsed). Acking straight away keeps the prefetch
+    window free, so a poison message never blocks the consumer.
+    """
+    headers = dict(properties.headers or {}) if properties else {}
+    attempt = int(headers.get(ATTEMPTS_HEADER, 0)) + 1
+    headers[ATTEMPTS_HEADER] = attempt
+    retry_properties = pika.BasicProperties(
+        delivery_mode=2,
+        content_type=properties.content_type if properties else None,
+        headers=headers
+    )
+
+    if not retryable or attempt >= MAX_DELIVERY_ATTEMPTS:
+        ch.basic_publish(
+            exchange=DEAD_LETTER_EXCHANGE,
+            routing_key=queue,
+            body=body,
+            properties=retry_properties
+        )
+        logger.error(f"Message on {queue} failed after {attempt} attempt(s), parked on {dead_queue_name(queue)}")
+    else:
+        ch.basic_publish(
+            exchange='',
+            routing_key=retry_queue_name(queue, attempt),
+            body=body,
+            properties=retry_properties
+        )
+        logger.warning(f"Message on {queue} failed (attempt {attempt}/{MAX_DELIVERY_ATTEMPTS}), retrying in {retry_delay_ms(attempt)}ms")
+    ch.basic_ack(delivery_tag=method.delivery_tag)
+
 class RabbitMQConnection:
   def __init__(self):
       self.host = RABBITMQ_HOST
@@ -27,9 +84,12 @@ class RabbitMQConnection:
           try:
               self.connection = pika.BlockingConnection(parameters)
               self.channel = self.connection.channel()
+              self.channel.basic_qos(prefetch_count=PREFETCH_COUNT)
               # Declare queues
-              self.channel.queue_declare(queue='recommendation_requests', durable=True)
-              self.channel.queue_declare(queue='embeddings', durable=True)
+              self.channel.exchange_declare(exchange=DEAD_LETTER_EXCHANGE, exchange_type='direct', durable=True)
+              for queue in WORK_QUEUES:
+                  self.channel.queue_declare(queue=queue, durable=True)
+                  self.declare_retry_queues(queue)
               logger.info(f"Connected to RabbitMQ at {self.host}:{self.port}, queues initialized")
               return self.connection, self.channel
           except pika.exceptions.AMQPConnectionError as e:
@@ -43,6 +103,22 @@ class RabbitMQConnection:
               raise
       raise pika.exceptions.AMQPConnectionError("Failed to connect to RabbitMQ")
   
+  def declare_retry_queues(self, queue: str):
+      # One delay queue per delay: RabbitMQ only expires messages at the
+      # head of a queue, so mixing TTLs in a single queue would stall retries
+      for attempt in range(1, MAX_DELIVERY_ATTEMPTS):
+          self.channel.queue_declare(
+              queue=retry_queue_name(queue, attempt),
+              durable=True,
+              arguments={
+                  'x-message-ttl': retry_delay_ms(attempt),
+                  'x-dead-letter-exchange': '',
+                  'x-dead-letter-routing-key': queue
+              }
+          )
+      self.channel.queue_declare(queue=dead_queue_name(queue), durable=True)
+      self.channel.queue_bind(queue=dead_queue_name(queue), exchange=DEAD_LETTER_EXCHANGE, routing_key=queue)
+
   def get_channel(self) -> pika.BlockingConnection.channel:
       if self.connection is None or self.connection.is_closed or self.channel is None or self.channel.is_closed:
           self.connection, self.channel = self.connect()
@@ -1,8 +1,8 @@
-from pyflink.datastream import StreamExecutionEnvironment
-from pyflink.table import StreamTableEnvironment, EnvironmentSettings
 import pika
 import os
+import sys
 import logging
+from app.startup import parse_args, run_checks
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -27,6 +27,10 @@ def ensure_rabbitmq_queues():
         raise
 
 def flink_job():
+    # pyflink pulls in the JVM gateway, so only import it once the job runs
+    from pyflink.datastream import StreamExecutionEnvironment
+    from pyflink.table import StreamTableEnvironment, EnvironmentSettings
+
     # Ensure queues
     ensure_rabbitmq_queues()
 
@@ -132,5 +136,21 @@ def flink_job():
 
     env.execute("Flink Streaming Job")
 
-if __name__ == "__main__":
+def check() -> int:
+    def load_pyflink():
+        import pyflink.datastream
+        import pyflink.table
+
+    return run_checks({
+        'pyflink': load_pyflink,
+        'rabbitmq': ensure_rabbitmq_queues,
+    })
+
+def main():
+    args = parse_args("Join user actions with embeddings into training data")
+    if args.check:
+        sys.exit(check())
     flink_job()
+
+if __name__ == "__main__":
+    main()
@@ -2,10 +2,12 @@ import numpy as np
 import pika
 import json
 import os
+import sys
 import logging
-from app.connect.pinecone import PineconeConnection
-from app.connect.rabbitmq import RabbitMQConnection
+from app.connect.pinecone import PineconeConnection, is_transient_error
+from app.connect.rabbitmq import RabbitMQConnection, retry_or_dead_letter
 from app.config import METADATA_FILE, POPULAR_MOVIES_FILE
+from app.startup import parse_args, run_checks
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -64,6 +66,12 @@ def callback(ch, method, properties, body):
     request = json.loads(body)
     req_id = request['reqId']
     user_id = request['userId']
+  except (ValueError, KeyError, TypeError) as e:
+    logger.error(f"Malformed recommendation request: {e}")
+    retry_or_dead_letter(ch, method, properties, body, 'recommendation_requests', retryable=False)
+    return
+
+  try:
     logger.info(f"Processing recommendation request: reqId={req_id}, userId={user_id}")
 
     movie_ids, movie_titles = get_recommendations(user_id)
@@ -72,11 +80,23 @@ def callback(ch, method, properties, body):
     user_index = pinecone_conn.get_user_index()
     movie_index = pinecone_conn.get_movie_index()
 
-    user_vector = user_index.fetch([str(user_id)])['vectors'][str(user_id)]['values']
-    movie_vectors = {
-        mid: movie_index.fetch([str(mid)])['vectors'][str(mid)]['values']
-        for mid in movie_ids
-    }
+    # A user or movie without an embedding is a permanent condition, not a
+    # transient failure: publish what exists so the request is still answered
+    user_vectors = user_index.fetch([str(user_id)])['vectors']
+    if str(user_id) in user_vectors:
+        user_vector = user_vectors[str(user_id)]['values']
+    else:
+        logger.warning(f"No embedding found for user_id: {user_id}, publishing empty embeddings")
+        user_vector = []
+        movie_ids = []
+
+    movie_vectors = {}
+    for mid in movie_ids:
+        vectors = movie_index.fetch([str(mid)])['vectors']
+        if str(mid) in vectors:
+            movie_vectors[mid] = vectors[str(mid)]['values']
+        else:
+            logger.warning(f"No embedding found for movie_id: {mid}, skipping")
 
     embedding_data = {
         'reqId': req_id,
@@ -97,10 +117,24 @@ def callback(ch, method, properties, body):
     logger.info(f"Recommendations for reqId {req_id}: {movie_titles}")
   except Exception as e:
     logger.error(f"Error processing recommendation request: {e}")
-    ch.basic_nack(delivery_tag=method.delivery_tag, requeue=False)
+    # Only Pinecone/network failures are retried; anything else would fail again
+    retry_or_dead_letter(ch, method, properties, body, 'recommendation_requests', retryable=is_transient_error(e))
+
+
+def check() -> int:
+  return run_checks({
+    'rabbitmq': rabbitmq_conn.get_channel,
+    'pinecone': lambda: pinecone_conn.get_user_index().describe_index_stats(),
+  })
 
 
 def main():
+  args = parse_args("Serve recommendation requests")
+  if args.check:
+    exit_code = check()
+    rabbitmq_conn.close()
+    sys.exit(exit_code)
+
   try:
     channel = rabbitmq_conn.get_channel()
     channel.basic_consume(
@@ -0,0 +1,108 @@
+import json
+import logging
+from typing import Optional, Sequence
+
+import numpy as np
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# word2vec-style smoothing: flattens the popularity curve so the head of the
+# catalogue doesn't swallow every negative
+POPULARITY_EXPONENT = 0.75
+
+
+class AliasSampler:
+    """Draws ids in O(1) from a fixed discrete distribution (Vose's alias method)."""
+
+    def __init__(self, weights: Sequence[float], seed: Optional[int] = None):
+        weights = np.asarray(weights, dtype=np.float64)
+        if weights.ndim != 1 or weights.size == 0:
+            raise ValueError("weights must be a non-empty 1-D array")
+        if np.any(weights < 0) or weights.sum() <= 0:
+            raise ValueError("weights must be non-negative with a positive sum")
+
+        n = weights.size
+        scaled = weights * n / weights.sum()
+        self.prob = np.ones(n, dtype=np.float64)
+        self.alias = np.arange(n, dtype=np.int64)
+        self.rng = np.random.default_rng(seed)
+
+        small = [i for i in range(n) if scaled[i] < 1.0]
+        large = [i for i in range(n) if scaled[i] >= 1.0]
+        while small and large:
+            under = small.pop()
+            over = large.pop()
+            self.prob[under] = scaled[under]
+            self.alias[under] = over
+            scaled[over] -= 1.0 - scaled[under]
+            if scaled[over] < 1.0:
+                small.append(over)
+            else:
+                large.append(over)
+        # Whatever is left is 1.0 up to rounding error; prob/alias already say so
+
+    def __len__(self) -> int:
+        return self.prob.size
+
+    def sample(self, size) -> np.ndarray:
+        columns = self.rng.integers(0, self.prob.size, size=size)
+        accept = self.rng.random(size=size) < self.prob[columns]
+        return np.where(accept, columns, self.alias[columns])
+
+
+def popularity_weights(num_movies: int, rating_counts: Optional[Sequence[int]] = None,
+                       popular_movies: Optional[Sequence[int]] = None) -> np.ndarray:
+    """Smoothed popularity weight for every movie id in [0, num_movies)."""
+    if rating_counts is not None:
+        counts = np.zeros(num_movies, dtype=np.float64)
+        known = np.asarray(rating_counts, dtype=np.float64)[:num_movies]
+        counts[:known.size] = known
+    else:
+        # Only the ranked top-N list is available: give it a Zipf-shaped
+        # count proxy and leave every other movie at the tail's count
+        counts = np.ones(num_movies, dtype=np.float64)
+        ranked = np.asarray([m for m in (popular_movies or []) if 0 <= m < num_movies], dtype=np.int64)
+        if ranked.size:
+            counts[ranked] = (ranked.size + 1) / np.arange(1, ranked.size + 1)
+    # Every movie stays reachable, otherwise unseen ids never get a gradient
+    counts = np.maximum(counts, 1.0)
+    return counts ** POPULARITY_EXPONENT
+
+
+def build_movie_sampler(r, num_movies: int, seed: Optional[int] = None) -> Optional[AliasSampler]:
+    """Build the negative sampler from the counts written by app.preprocess.
+
+    Returns None when there are fewer than two movies, since a negative must
+    differ from its positive.
+    """
+    if num_movies < 2:
+        logger.warning(f"Only {num_movies} movie embedding(s) found (has app.preprocess run?), training without negative sampling")
+        return None
+    rating_counts = r.get("movie_rating_counts")
+    popular_movies = r.get("popular_movies")
+    weights = popularity_weights(
+        num_movies,
+        rating_counts=json.loads(rating_counts) if rating_counts else None,
+        popular_movies=json.loads(popular_movies) if popular_movies else None,
+    )
+    source = "rating counts" if rating_counts else "popular_movies"
+    logger.info(f"Built negative sampler over {num_movies} movies from {source}")
+    return AliasSampler(weights, seed=seed)
+
+
+def sample_negatives(sampler: AliasSampler, movie_ids: np.ndarray, k: int) -> np.ndarray:
+    """Draw k negatives per positive movie id, shape (len(movie_ids), k).
+
+    Draws that hit their own positive are redrawn once; a second collision
+    is shifted to the next id so no row ever contains its positive. The
+    sampler must cover at least two movies.
+    """
+    movie_ids = np.asarray(movie_ids, dtype=np.int64).reshape(-1, 1)
+    negatives = sampler.sample((movie_ids.shape[0], k))
+    collisions = negatives == movie_ids
+    if collisions.any():
+        negatives[collisions] = sampler.sample(int(collisions.sum()))
+        collisions = negatives == movie_ids
+        negatives[collisions] = (negatives[collisions] + 1) % len(sampler)
+    return negatives
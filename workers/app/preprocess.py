@@ -76,6 +76,11 @@ if user_embeddings_exist and movie_embeddings_exist and movie_metadata_exist and
         popular_movies = movie_data.groupby('movieId').size().sort_values(ascending=False).head(100).index.tolist()
         r.set("popular_movies", json.dumps(popular_movies))
 
+    # Store rating count per movie (indexed by encoded movieId) for negative sampling
+    if not r.exists("movie_rating_counts"):
+        rating_counts = movie_data.groupby('movieId').size().reindex(range(num_movies), fill_value=0).tolist()
+        r.set("movie_rating_counts", json.dumps(rating_counts))
+
     print("Preprocessing complete!")
     print(f"Summary:")
     print(f"- Users processed: {num_users}")
@@ -0,0 +1,31 @@
+import argparse
+import logging
+import time
+from typing import Callable, Dict
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+def parse_args(description: str, argv=None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=description)
+    parser.add_argument(
+        '--check',
+        action='store_true',
+        help='load dependencies, probe every backing service, then exit (0 = ready)'
+    )
+    return parser.parse_args(argv)
+
+
+def run_checks(checks: Dict[str, Callable[[], object]]) -> int:
+    """Run readiness checks in order and return a process exit code."""
+    ok = True
+    for name, check in checks.items():
+        start = time.perf_counter()
+        try:
+            check()
+            logger.info(f"[check] {name}: ok ({time.perf_counter() - start:.2f}s)")
+        except Exception as e:
+            logger.error(f"[check] {name}: failed ({time.perf_counter() - start:.2f}s): {e}")
+            ok = False
+    return 0 if ok else 1
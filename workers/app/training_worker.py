@@ -1,10 +1,14 @@
 import numpy as np
 import json
+import sys
 import logging
-from scipy.sparse import csr_matrix
-from sklearn.decomposition import TruncatedSVD
-from app.connect.pinecone import PineconeConnection
-from app.connect.rabbitmq import RabbitMQConnection
+from typing import TYPE_CHECKING
+from app.connect.pinecone import PineconeConnection, is_transient_error
+from app.connect.rabbitmq import RabbitMQConnection, retry_or_dead_letter
+from app.startup import parse_args, run_checks
+
+if TYPE_CHECKING:
+    from scipy.sparse import csr_matrix
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -14,7 +18,9 @@ rabbitmq_conn = RabbitMQConnection()
 
 embedding_dim = 64
 
-def load_user_item_matrix() -> csr_matrix:
+def load_user_item_matrix() -> "csr_matrix":
+    # scipy/sklearn are imported on first use to keep worker startup fast
+    from scipy.sparse import csr_matrix
     try:
         user_index = pinecone_conn.get_user_index()
         movie_index = pinecone_conn.get_movie_index()
@@ -33,6 +39,7 @@ def load_user_item_matrix() -> csr_matrix:
         return csr_matrix((1, 1), dtype=np.float32)
 
 def update_embeddings(matrix, num_users, num_movies):
+    from sklearn.decomposition import TruncatedSVD
     svd = TruncatedSVD(n_components=embedding_dim, random_state=42)
     user_embeddings = svd.fit_transform(matrix)
     movie_embeddings = svd.components_.T
@@ -45,14 +52,25 @@ def update_embeddings(matrix, num_users, num_movies):
 
 def callback(ch, method, properties, body):
     try:
-        user_index = pinecone_conn.get_user_index()
-        movie_index = pinecone_conn.get_movie_index()
-
         data = json.loads(body)
         user_id = data['userId']
         movie_id = data['movieId']
         rating = data['rating']
-        
+    except (ValueError, KeyError, TypeError) as e:
+        logger.error(f"Malformed training data: {e}")
+        retry_or_dead_letter(ch, method, properties, body, 'training_data', retryable=False)
+        return
+
+    # Views arrive without a rating and carry nothing for the rating matrix
+    if rating is None:
+        ch.basic_ack(delivery_tag=method.delivery_tag)
+        logger.info(f"Skipping unrated event: user_id={user_id}, movie_id={movie_id}")
+        return
+
+    try:
+        user_index = pinecone_conn.get_user_index()
+        movie_index = pinecone_conn.get_movie_index()
+
         logger.info(f"Processing training data: user_id={user_id}, movie_id={movie_id}, rating={rating}")
 
         # Update matrix and get new embeddings
@@ -60,6 +78,7 @@ def callback(ch, method, properties, body):
         try:
             matrix[user_id, movie_id] = rating
         except IndexError:
+            from scipy.sparse import csr_matrix
             num_users = max(matrix.shape[0], user_id + 1)
             num_movies = max(matrix.shape[1], movie_id + 1)
             new_matrix = csr_matrix((num_users, num_movies), dtype=np.float32)
@@ -80,9 +99,27 @@ def callback(ch, method, properties, body):
         logger.info(f"Trained on user_id={user_id}, movie_id={movie_id}, rating={rating}")
     except Exception as e:
         logger.error(f"Error processing training data: {e}")
-        ch.basic_nack(delivery_tag=method.delivery_tag, requeue=False)
+        # Only Pinecone/network failures are retried; anything else would fail again
+        retry_or_dead_letter(ch, method, properties, body, 'training_data', retryable=is_transient_error(e))
+
+def check() -> int:
+    def load_ml_libraries():
+        import scipy.sparse
+        import sklearn.decomposition
+
+    return run_checks({
+        'scipy/sklearn': load_ml_libraries,
+        'rabbitmq': rabbitmq_conn.get_channel,
+        'pinecone': lambda: pinecone_conn.get_user_index().describe_index_stats(),
+    })
 
 def main():
+    args = parse_args("Update embeddings from training data")
+    if args.check:
+        exit_code = check()
+        rabbitmq_conn.close()
+        sys.exit(exit_code)
+
     try:
         channel = rabbitmq_conn.get_channel()
         for queue in ['training_data', 'user_actions', 'embeddings', 'recommendation_requests']:
@@ -1,29 +1,30 @@
 import numpy as np
-import tensorflow as tf
-from tensorflow.keras.layers import Dense, Embedding, Input
-from tensorflow.keras.models import Model
-import pika
-import redis
 import json
 import os
-from .config import REDIS_HOST, REDIS_PORT, REDIS_USERNAME, REDIS_PASSWORD, REDIS_DB
-
-r = redis.Redis(
-    host=REDIS_HOST,
-    port=REDIS_PORT,
-    username=REDIS_USERNAME,
-    password=REDIS_PASSWORD,
-    db=REDIS_DB,
-    decode_responses=True
-)
-
-# Initialize model
-num_users = len([k for k in r.keys("user_embedding:*")])
-num_movies = len([k for k in r.keys("movie_embedding:*")])
+import sys
+from .connect.redis import RedisConnection
+from .connect.rabbitmq import RabbitMQConnection, retry_or_dead_letter
+from .negative_sampling import build_movie_sampler, sample_negatives
+from .startup import parse_args, run_checks
+
+redis_conn = RedisConnection()
+rabbitmq_conn = RabbitMQConnection()
+
+# Populated by load_model(); TensorFlow is only imported when the worker starts training
+r = None
+model = None
+movie_sampler = None
+
 embedding_dim = 64
+num_negatives = int(os.getenv('DEEPFM_NUM_NEGATIVES', 4))
+positive_rating = 3.5
 
 
 def build_deepfm(num_users, num_movies, embedding_dim):
+  import tensorflow as tf
+  from tensorflow.keras.layers import Dense, Embedding, Input
+  from tensorflow.keras.models import Model
+
   user_inputs = Input(shape=(1,), name='user_input')
   movie_inputs = Input(shape=(1,), name='movie_input')
 
@@ -44,34 +45,83 @@ def build_deepfm(num_users, num_movies, embedding_dim):
   model.compile(optimizer='adam', loss='binary_crossentropy', metrics=['accuracy'])
   return model
 
-model = build_deepfm(num_users, num_movies, embedding_dim)
+def load_model():
+  global r, model, movie_sampler
+  r = redis_conn.get_client()
+  num_users = len([k for k in r.keys("user_embedding:*")])
+  num_movies = len([k for k in r.keys("movie_embedding:*")])
+  model = build_deepfm(num_users, num_movies, embedding_dim)
+  movie_sampler = build_movie_sampler(r, num_movies)
 
-# RabbitMQ connection
-rabbitmq_host = os.getenv('RABBITMQ_HOST', 'rabbitmq')
-connection = pika.BlockingConnection(pika.ConnectionParameters(host=rabbitmq_host, port=5672))
-channel = connection.channel()
-channel.queue_declare(queue='training_data')
+def build_batch(user_id, movie_id, label):
+  # Every interaction is implicit positive feedback unless it carries a low
+  # rating; positives are paired with k popularity-sampled negatives
+  if label == 0 or movie_sampler is None:
+    return np.array([user_id]), np.array([movie_id]), np.array([float(label)], dtype=np.float32)
+
+  negatives = sample_negatives(movie_sampler, np.array([movie_id]), num_negatives).ravel()
+  X_user = np.full(1 + negatives.size, user_id)
+  X_movie = np.concatenate(([movie_id], negatives))
+  y = np.zeros(1 + negatives.size, dtype=np.float32)
+  y[0] = 1.0
+  return X_user, X_movie, y
 
 def callback(ch, method, properties, body):
-  data = json.loads(body)
-  user_id = data['userId']
-  movie_id = data['movieId']
-  rating = data['rating']
-
-  X_user = np.array([user_id])
-  X_movie = np.array([movie_id])
-  y = np.array([1 if rating >= 3.5 else 0])
-
-  model.fit([X_user, X_movie], y, epochs=1, verbose=0)
-
-  # Update embeddings in Redis
-  user_emb_layer = model.get_layer('user_embedding')
-  movie_emb_layer = model.get_layer('movie_embedding')
-  r.set(f"user_embedding:{user_id}", json.dumps(user_emb_layer.get_weights()[0][user_id].tolist()))
-  r.set(f"movie_embedding:{movie_id}", json.dumps(movie_emb_layer.get_weights()[0][movie_id].tolist()))
-  
-  print(f"Trained on user {user_id} and movie {movie_id} with rating {rating}.")
-  
-channel.basic_consume(queue='training_data', on_message_callback=callback, auto_ack=True)
-print('Waiting for training data...')
-channel.start_consuming()
+  try:
+    data = json.loads(body)
+    user_id = data['userId']
+    movie_id = data['movieId']
+    rating = data.get('rating')
+  except (ValueError, KeyError, TypeError) as e:
+    print(f"Malformed training data: {e}")
+    retry_or_dead_letter(ch, method, properties, body, 'training_data', retryable=False)
+    return
+
+  try:
+    label = 0 if rating is not None and rating < positive_rating else 1
+
+    X_user, X_movie, y = build_batch(user_id, movie_id, label)
+    model.train_on_batch([X_user, X_movie], y)
+
+    # Update embeddings in Redis for every movie the batch touched
+    user_weights = model.get_layer('user_embedding').get_weights()[0]
+    movie_weights = model.get_layer('movie_embedding').get_weights()[0]
+    pipe = r.pipeline()
+    pipe.set(f"user_embedding:{user_id}", json.dumps(user_weights[user_id].tolist()))
+    for mid in np.unique(X_movie):
+      pipe.set(f"movie_embedding:{mid}", json.dumps(movie_weights[mid].tolist()))
+    pipe.execute()
+  except Exception as e:
+    print(f"Error training on user {user_id} and movie {movie_id}: {e}")
+    retry_or_dead_letter(ch, method, properties, body, 'training_data')
+    return
+
+  ch.basic_ack(delivery_tag=method.delivery_tag)
+  print(f"Trained on user {user_id} and movie {movie_id} (label {label}) with {len(y) - 1} sampled negatives.")
+
+def check() -> int:
+  def load_tensorflow():
+    import tensorflow
+
+  return run_checks({
+    'tensorflow': load_tensorflow,
+    'redis': redis_conn.get_client,
+    'rabbitmq': rabbitmq_conn.get_channel,
+  })
+
+def main():
+  args = parse_args("Train the DeepFM model on streamed training data")
+  if args.check:
+    exit_code = check()
+    rabbitmq_conn.close()
+    redis_conn.close()
+    sys.exit(exit_code)
+
+  load_model()
+  channel = rabbitmq_conn.get_channel()
+  channel.basic_consume(queue='training_data', on_message_callback=callback, auto_ack=False)
+  print('Waiting for training data...')
+  channel.start_consuming()
+
+if __name__ == "__main__":
+  main()
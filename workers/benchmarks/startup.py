@@ -0,0 +1,87 @@
+"""Measure worker cold-start and import time.
+
+Run from the workers directory:
+
+    python benchmarks/startup.py
+    python benchmarks/startup.py --check   # also time `python -m <worker> --check`
+
+Each module is imported in a fresh interpreter; import time is the
+cumulative figure reported by `python -X importtime` for the module itself,
+cold start is the wall-clock time of the whole process.
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+WORKERS = [
+    'app.inference_worker',
+    'app.training_worker',
+    'app.training_worker_deepfm',
+    'app.flink_job',
+]
+
+WORKERS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+
+
+def run(args):
+    start = time.perf_counter()
+    proc = subprocess.run(
+        [sys.executable, *args],
+        cwd=WORKERS_DIR,
+        capture_output=True,
+        text=True
+    )
+    return proc, time.perf_counter() - start
+
+
+def import_time_us(module: str, stderr: str):
+    # Lines look like: "import time:  self [us] | cumulative | imported package"
+    for line in stderr.splitlines():
+        if not line.startswith('import time:'):
+            continue
+        fields = [f.strip() for f in line[len('import time:'):].split('|')]
+        if len(fields) == 3 and fields[2].strip() == module:
+            return int(fields[1])
+    return None
+
+
+def bench_import(module: str, repeat: int):
+    wall, cumulative = [], []
+    for _ in range(repeat):
+        proc, elapsed = run(['-X', 'importtime', '-c', f'import {module}'])
+        if proc.returncode != 0:
+            error = proc.stderr.strip().splitlines()[-1] if proc.stderr.strip() else 'unknown error'
+            return None, None, error
+        wall.append(elapsed)
+        cumulative.append(import_time_us(module, proc.stderr))
+    return statistics.median(wall), statistics.median([c for c in cumulative if c is not None]), None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--check', action='store_true', help='also time each worker\'s --check readiness mode')
+    args = parser.parse_args()
+
+    print(f"{'module':<30} {'cold start':>12} {'import':>12}")
+    for module in WORKERS:
+        wall, cumulative_us, error = bench_import(module, args.repeat)
+        if error:
+            print(f"{module:<30} failed: {error}")
+            continue
+        print(f"{module:<30} {wall * 1000:>10.1f}ms {cumulative_us / 1000:>10.1f}ms")
+
+    if args.check:
+        print()
+        print(f"{'module':<30} {'--check':>12} {'status':>8}")
+        for module in WORKERS:
+            proc, elapsed = run(['-m', module, '--check'])
+            status = 'ready' if proc.returncode == 0 else 'not ready'
+            print(f"{module:<30} {elapsed * 1000:>10.1f}ms {status:>10}")
+
+
+if __name__ == '__main__':
+    main()